@@ -0,0 +1,67 @@
+"""JSON helpers backed by orjson when available, falling back to the stdlib json module.
+
+loads() accepts str or UTF-8 bytes with either backend, dumps() returns UTF-8 bytes.
+With orjson, integers wider than 64 bits are parsed as floats and dumps() writes
+NaN/Infinity as null, so data that must round-trip exactly should use json directly.
+"""
+
+import json
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, installed with the "fast" extra
+    orjson = None
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON from str or UTF-8 bytes.
+
+    Falls back to the stdlib parser for input orjson rejects but json accepts,
+    such as the NaN and Infinity values the proxy captures write.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+# loads() handles orjson's own error and only raises the stdlib json one
+JSONDecodeError = json.JSONDecodeError
+
+
+def _dataclass_fields(obj: Any) -> dict[str, Any]:
+    """json.dump default hook: shallow field dict, nested values are encoded recursively."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which the stdlib encoder handles
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dump_file(obj: Any, path: Path) -> None:
+    """Write obj to path as UTF-8 JSON indented by two spaces.
+
+    Dataclass instances are written as objects of their fields, without an
+    intermediate dataclasses.asdict() copy.
+    """
+    if orjson is not None:
+        try:
+            path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+            return
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which the stdlib encoder handles
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, indent=2, default=_dataclass_fields)
@@ -2,15 +2,17 @@
 
 Public API:
 - cook_traces(): Main entry point for cooking trace files
+- read_records(): Read raw trace records from a JSONL/JSON file
 - TraceCooker: Class for processing traces in memory
 - Data classes: CookedMessage, CookedTool, CookedRequest, CookedOutput, ApiFormat
 """
 
-from .cooker import TraceCooker, cook_traces
+from .cooker import TraceCooker, cook_traces, read_records
 from .models import ApiFormat, CookedMessage, CookedOutput, CookedRequest, CookedTool
 
 __all__ = [
     "cook_traces",
+    "read_records",
     "TraceCooker",
     "CookedMessage",
     "CookedTool",
@@ -1,8 +1,11 @@
 """Main trace cooker that coordinates providers, deduplication, and dependency analysis."""
 
-import json
+from collections.abc import Iterable
+from operator import attrgetter
 from pathlib import Path
 
+from .._json import JSONDecodeError, dump_file, loads
+from .base import BaseProvider
 from .deduplicator import MessageDeduplicator, ToolDeduplicator
 from .dependency import DependencyAnalyzer
 from .models import ApiFormat, CookedOutput, CookedRequest
@@ -25,52 +28,98 @@ class TraceCooker:
         self._tool_dedup = ToolDeduplicator()
         self._requests: list[CookedRequest] = []
         self._dependency_analyzer = DependencyAnalyzer()
+        # One instance per provider class is reused for the records of a cook
+        self._provider_cache: dict[type[BaseProvider], BaseProvider] = {}
 
-    def cook(self, records: list[dict], api_format: ApiFormat = "auto") -> CookedOutput:
+    def cook(self, records: Iterable[dict], api_format: ApiFormat = "auto") -> CookedOutput:
         """Process all records and return deduplicated output.
 
         Args:
-            records: List of raw trace records
+            records: Raw trace records, consumed in a single pass
             api_format: API format ("auto", "openai", "claude", or "gemini")
 
         Returns:
             CookedOutput with deduplicated messages, tools, and requests
         """
         # Step 1: Process all records
+        # An explicit format uses the same provider for every record, so resolve it once
+        fixed_provider = None if api_format == "auto" else self._get_provider(api_format)
         for record in records:
-            cooked_request = self._process_record(record, api_format)
+            cooked_request = self._process_record(record, fixed_provider)
             self._requests.append(cooked_request)
 
         # Step 2: Sort by timestamp
-        self._requests.sort(key=lambda r: r.timestamp)
+        self._requests.sort(key=attrgetter("timestamp"))
 
         # Step 3: Analyze dependencies
         self._dependency_analyzer.analyze(self._requests)
 
+        # Providers may memoize per cook, don't share that state with the next one
+        self._provider_cache.clear()
+
         return CookedOutput(
             messages=self._message_dedup.messages,
             tools=self._tool_dedup.tools,
             requests=self._requests,
         )
 
-    def _process_record(self, record: dict, api_format: ApiFormat) -> CookedRequest:
+    def _get_provider(self, api_format: ApiFormat, record: dict | None = None) -> BaseProvider:
+        """Return the shared provider instance for a format, detected from record if "auto"."""
+        provider_cls = get_provider(api_format, record)
+        provider = self._provider_cache.get(provider_cls)
+        if provider is None:
+            provider = self._provider_cache[provider_cls] = provider_cls()
+        return provider
+
+    def _process_record(self, record: dict, provider: BaseProvider | None = None) -> CookedRequest:
         """Process a single trace record using the appropriate provider.
 
         Args:
             record: Raw trace record
-            api_format: API format hint
+            provider: Provider to use, or None to auto-detect from the record
 
         Returns:
             CookedRequest with parent_id set to None (dependency analysis done later)
         """
         # Get the appropriate provider
-        provider_cls = get_provider(api_format, record)
-        provider = provider_cls()
+        if provider is None:
+            provider = self._get_provider("auto", record)
 
         # Let the provider handle all format-specific details
         return provider.process_record(record, self._message_dedup, self._tool_dedup)
 
 
+def read_records(input_file: str | Path) -> list[dict]:
+    """Read raw trace records from a JSONL file, or a JSON file with one record or an array.
+
+    JSONL is parsed line by line, so the whole file is never held in memory as text.
+    """
+    with open(input_file, "rb") as f:
+        first_line = next((line for line in f if line.strip()), None)
+        if first_line is None:
+            return []
+
+        # A first line that is a complete record means JSONL
+        try:
+            first = loads(first_line)
+        except JSONDecodeError:
+            first = None
+        if isinstance(first, dict):
+            records = [first]
+            records.extend(loads(line) for line in f if line.strip())
+            return records
+
+        # A one-line JSON document was already parsed above, don't parse it twice
+        if first is not None and not any(line.strip() for line in f):
+            data = first
+        else:
+            # Otherwise parse the whole file as a single JSON document
+            f.seek(0)
+            data = loads(f.read())
+
+    return data if isinstance(data, list) else [data]
+
+
 def cook_traces(input_path: str, output_path: str, api_format: str = "auto") -> None:
     """Main entry point: read JSONL/JSON traces and write cooked JSON output.
 
@@ -83,22 +132,7 @@ def cook_traces(input_path: str, output_path: str, api_format: str = "auto") ->
     output_file = Path(output_path)
 
     # Read records
-    records = []
-    content = input_file.read_text(encoding="utf-8")
-
-    # Try to parse as JSON array first (single JSON file)
-    try:
-        data = json.loads(content)
-        if isinstance(data, list):
-            records = data
-        else:
-            # Single record
-            records = [data]
-    except json.JSONDecodeError:
-        # Parse as JSONL
-        for line in content.strip().split("\n"):
-            if line.strip():
-                records.append(json.loads(line))
+    records = read_records(input_file)
 
     # Process records
     cooker = TraceCooker()
@@ -107,8 +141,7 @@ def cook_traces(input_path: str, output_path: str, api_format: str = "auto") ->
 
     # Write output
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(output.to_dict(), f, ensure_ascii=False, indent=2)
+    dump_file(output, output_file)
 
     print(f"Processed {len(records)} records")
     print(f"  Messages: {len(output.messages)} (deduplicated)")
@@ -1,49 +1,52 @@
 """Deduplication logic for messages and tools."""
 
 import hashlib
-import json
+from typing import Any
 
 from .models import CookedMessage, CookedTool
 
 
+def _canonical(value: Any) -> Any:
+    """Return parsed JSON with dict keys in sorted order, so its repr is stable."""
+    if isinstance(value, dict):
+        return {k: _canonical(value[k]) for k in sorted(value)}
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _digest(text: str) -> int:
+    """Return a 64-bit digest of text as an int, which is cheaper to hash than a hex string."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
 def _compute_message_hash(
     role: str,
     content: str,
     tool_calls: list[dict] | None,
     tool_use_id: str | None = None,
     is_error: bool | None = None,
-) -> str:
+) -> int:
     """Compute stable hash for message deduplication."""
-    data = {
-        "role": role,
-        "content": content,
-        "tool_calls": tool_calls,
-        "tool_use_id": tool_use_id,
-        "is_error": is_error,
-    }
-    json_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(json_str.encode()).hexdigest()[:16]
+    key = (role, _canonical(content), _canonical(tool_calls), tool_use_id, is_error)
+    return _digest(repr(key))
 
 
 def _compute_tool_hash(
     name: str, description: str, parameters: dict, is_server_side: bool = False
-) -> str:
+) -> int:
     """Compute stable hash for tool deduplication."""
-    data = {
-        "name": name,
-        "description": description,
-        "parameters": parameters,
-        "is_server_side": is_server_side,
-    }
-    json_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(json_str.encode()).hexdigest()[:16]
+    key = (name, description, _canonical(parameters), is_server_side)
+    return _digest(repr(key))
 
 
 class MessageDeduplicator:
     """Handles message deduplication via hash-based ID generation."""
 
     def __init__(self) -> None:
-        self._hash_to_id: dict[str, str] = {}
+        self._hash_to_id: dict[int, str] = {}
+        # Exact (role, content) lookup for plain messages, skipping the digest on repeats
+        self._plain_to_id: dict[tuple[str, str], str] = {}
         self._messages: list[CookedMessage] = []
         self._counter = 0
 
@@ -68,10 +71,20 @@ class MessageDeduplicator:
             Message ID (e.g., "m0", "m1", ...)
         """
         content = content or ""
+        # Content is not always a str (e.g. an OpenAI object), which can't be a dict key
+        plain = (
+            type(content) is str and tool_calls is None and tool_use_id is None and is_error is None
+        )
+        if plain:
+            existing = self._plain_to_id.get((role, content))
+            if existing is not None:
+                return existing
+
         msg_hash = _compute_message_hash(role, content, tool_calls, tool_use_id, is_error)
 
-        if msg_hash in self._hash_to_id:
-            return self._hash_to_id[msg_hash]
+        existing = self._hash_to_id.get(msg_hash)
+        if existing is not None:
+            return existing
 
         msg_id = f"m{self._counter}"
         self._counter += 1
@@ -86,6 +99,8 @@ class MessageDeduplicator:
         )
         self._messages.append(msg)
         self._hash_to_id[msg_hash] = msg_id
+        if plain:
+            self._plain_to_id[role, content] = msg_id
         return msg_id
 
     @property
@@ -98,7 +113,7 @@ class ToolDeduplicator:
     """Handles tool definition deduplication via hash-based ID generation."""
 
     def __init__(self) -> None:
-        self._hash_to_id: dict[str, str] = {}
+        self._hash_to_id: dict[int, str] = {}
         self._tools: list[CookedTool] = []
         self._counter = 0
 
@@ -122,8 +137,9 @@ class ToolDeduplicator:
         """
         tool_hash = _compute_tool_hash(name, description, parameters, is_server_side)
 
-        if tool_hash in self._hash_to_id:
-            return self._hash_to_id[tool_hash]
+        existing = self._hash_to_id.get(tool_hash)
+        if existing is not None:
+            return existing
 
         tool_id = f"t{self._counter}"
         self._counter += 1
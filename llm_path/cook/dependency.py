@@ -1,7 +1,54 @@
 """Dependency analysis for request sequences."""
 
+import math
+from array import array
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from itertools import chain
+
 from .models import CookedRequest
 
+# Message ID sequences packed for fast comparison, see DependencyAnalyzer._make_encoder
+PackedIds = bytes | str | array
+
+try:
+    from rapidfuzz.distance import Levenshtein
+except ImportError:  # Optional speedup, installed with the "fast" extra
+    Levenshtein = None
+
+
+@dataclass
+class _Entry:
+    """A request plus the lookup data derived from it once per analysis.
+
+    Message IDs are remapped to small ints and packed into a flat sequence, so edit
+    distance compares machine integers instead of ID strings.
+    """
+
+    request: CookedRequest
+    messages: PackedIds  # request_messages
+    expected_prefix: PackedIds  # request_messages + response_messages
+    tools: frozenset[str]
+
+
+@dataclass
+class _Candidates:
+    """Earlier same-model requests, indexed to narrow down the parent search."""
+
+    entries: list[_Entry] = field(default_factory=list)
+    # Latest entry for each expected prefix
+    by_prefix: dict[PackedIds, _Entry] = field(default_factory=dict)
+    # Positions in entries, grouped by expected prefix length
+    by_length: defaultdict[int, list[int]] = field(default_factory=lambda: defaultdict(list))
+
+    def add(self, entry: _Entry) -> None:
+        """Append entry as the most recent candidate."""
+        self.by_length[len(entry.expected_prefix)].append(len(self.entries))
+        self.entries.append(entry)
+        if not isinstance(entry.expected_prefix, array):  # array is unhashable
+            self.by_prefix[entry.expected_prefix] = entry
+
 
 class DependencyAnalyzer:
     """Analyzes request dependencies using Levenshtein distance and tool matching.
@@ -23,98 +70,198 @@ class DependencyAnalyzer:
         Args:
             requests: List of CookedRequest sorted by timestamp ascending
         """
-        for idx, req in enumerate(requests):
-            if idx == 0:
-                req.parent_id = None
-            else:
-                req.parent_id = self._find_parent(req, requests[:idx])
+        encode = self._make_encoder(requests)
+        # Earlier requests grouped by model (no cross-model dependencies)
+        by_model: dict[str, _Candidates] = defaultdict(_Candidates)
+        for req in requests:
+            entry = self._make_entry(req, encode)
+            candidates = by_model[req.model]
+            req.parent_id = self._find_parent(entry, candidates)
+            candidates.add(entry)
 
-    def _find_parent(self, curr: CookedRequest, candidates: list[CookedRequest]) -> str | None:
+    def _make_encoder(self, requests: list[CookedRequest]) -> Callable[[list[str]], PackedIds]:
+        """Build a function packing message ID lists into the narrowest flat sequence.
+
+        bytes and str are compared natively by rapidfuzz (one code unit per
+        message), array is only used once message count exceeds the Unicode range.
+        """
+        index: dict[str, int] = {}
+        for req in requests:
+            for msg_id in chain(req.request_messages, req.response_messages):
+                index.setdefault(msg_id, len(index))
+
+        if len(index) <= 0x100:
+            lookup = index.__getitem__
+            return lambda ids: bytes(map(lookup, ids))
+        if len(index) <= 0x110000:
+            chars = {msg_id: chr(n) for msg_id, n in index.items()}
+            return lambda ids: "".join(map(chars.__getitem__, ids))
+        lookup = index.__getitem__
+        return lambda ids: array("I", map(lookup, ids))
+
+    def _make_entry(self, req: CookedRequest, encode: Callable[[list[str]], PackedIds]) -> _Entry:
+        """Precompute the message sequences and tool set used by every match score."""
+        messages = encode(req.request_messages)
+        return _Entry(
+            request=req,
+            messages=messages,
+            expected_prefix=messages + encode(req.response_messages),
+            tools=frozenset(req.tools),
+        )
+
+    def _find_parent(self, curr: _Entry, candidates: _Candidates) -> str | None:
         """Find the best parent for current request.
 
         Args:
             curr: Current request
-            candidates: Requests earlier than curr (sorted by timestamp ascending)
+            candidates: Same-model requests earlier than curr (sorted by timestamp ascending)
 
         Returns:
             parent_id or None (becomes new root if no good match)
         """
-        # Filter: only consider candidates with same model
-        same_model_candidates = [c for c in candidates if c.model == curr.model]
-
-        if not same_model_candidates:
+        if not candidates.entries:
             return None  # No same-model candidate, become new root
 
+        # Forest support: become new root if score is too low
+        threshold = -len(curr.messages) * self.RELATIVE_THRESHOLD
+
+        # The best parent scores at least as high as the prefix match, so candidates
+        # scoring lower are cut off early. Equal scores still get through for the tie-break.
+        min_score = max(threshold, self._prefix_match_score(curr, candidates.by_prefix))
+
+        # Edit distance is at least the length difference, so only candidates whose expected
+        # prefix length is within max_distance of curr's can reach min_score
+        max_distance = math.floor(-min_score)
+        length = len(curr.messages)
+        positions = []
+        for n in range(max(0, length - max_distance), length + max_distance + 1):
+            positions.extend(candidates.by_length.get(n, ()))
+        positions.sort(reverse=True)  # From most recent, same score picks latest
+
         # Use combined score to find most similar parent
         best_score = float("-inf")
         best_parent_id = None
 
-        for c in reversed(same_model_candidates):  # From most recent, same score picks latest
-            score = self._match_score(curr, c)
+        for i in positions:
+            c = candidates.entries[i]
+            score = self._match_score(curr, c, min_score, best_score)
             if score > best_score:
                 best_score = score
-                best_parent_id = c.id
+                best_parent_id = c.request.id
 
-        # Forest support: become new root if score is too low
-        threshold = -len(curr.request_messages) * self.RELATIVE_THRESHOLD
         if best_score < threshold:
             return None
 
         return best_parent_id
 
-    def _build_expected_prefix(self, candidate: CookedRequest) -> list[str]:
-        """Build expected message prefix.
+    def _prefix_match_score(self, curr: _Entry, prefixes: dict[PackedIds, _Entry]) -> float:
+        """Score the candidate whose expected prefix is the longest prefix of curr's messages.
 
-        If candidate has response_messages, prefix = request_messages + response_messages
-        Otherwise just request_messages
+        Its edit distance is just the count of curr's remaining messages, so no DP is
+        needed. Returns -inf when no candidate's expected prefix starts curr's messages.
         """
-        prefix = list(candidate.request_messages)
-        if candidate.response_messages:
-            prefix.extend(candidate.response_messages)
-        return prefix
+        messages = curr.messages
+        if isinstance(messages, array):
+            return float("-inf")
+        for k in range(len(messages), -1, -1):
+            candidate = prefixes.get(messages[:k])
+            if candidate is not None:
+                tool_diff = len(curr.tools ^ candidate.tools)
+                return -(len(messages) - k) - self.TOOL_DIFF_PENALTY * tool_diff
+        return float("-inf")
 
-    def _match_score(self, curr: CookedRequest, candidate: CookedRequest) -> float:
+    def _match_score(
+        self, curr: _Entry, candidate: _Entry, threshold: float, best_score: float
+    ) -> float:
         """Compute combined match score (higher is more similar).
 
         Score = message_score + tool_score
-        - message_score: negative edit distance
+        - message_score: negative edit distance between candidate's expected prefix
+          (request_messages + response_messages) and current request_messages
         - tool_score: penalty for tool differences
-        """
-        # Message score: negative edit distance
-        a = self._build_expected_prefix(candidate)
-        b = curr.request_messages
-        message_score = -self._levenshtein(a, b)
 
+        Returns -inf when the candidate can neither reach threshold nor score above
+        best_score, stopping before the full edit distance where possible.
+        """
         # Tool score: penalty for different tools
-        curr_tools = set(curr.tools)
-        candidate_tools = set(candidate.tools)
-        tool_diff = len(curr_tools.symmetric_difference(candidate_tools))
+        tool_diff = len(curr.tools ^ candidate.tools)
         tool_score = -self.TOOL_DIFF_PENALTY * tool_diff
 
-        return message_score + tool_score
+        # Largest edit distance that still reaches threshold and beats best_score
+        max_distance = math.floor(tool_score - threshold)
+        if best_score > float("-inf"):
+            max_distance = min(max_distance, math.ceil(tool_score - best_score) - 1)
+        if max_distance < 0:
+            return float("-inf")  # Tool penalty alone rules this candidate out
+
+        # Message score: negative edit distance, which is at least the length difference
+        a, b = candidate.expected_prefix, curr.messages
+        if abs(len(a) - len(b)) > max_distance:
+            return float("-inf")
+        distance = self._levenshtein(a, b, max_distance)
+        if distance > max_distance:
+            return float("-inf")
+
+        return -distance + tool_score
 
-    def _levenshtein(self, a: list[str], b: list[str]) -> int:
+    def _levenshtein(self, a: PackedIds, b: PackedIds, score_cutoff: int | None = None) -> int:
         """Compute Levenshtein distance between two lists.
 
         Operations: add, delete, replace
+
+        If the distance is greater than score_cutoff, any value greater than
+        score_cutoff may be returned.
         """
-        m, n = len(a), len(b)
-        dp = [[0] * (n + 1) for _ in range(m + 1)]
-
-        for i in range(m + 1):
-            dp[i][0] = i
-        for j in range(n + 1):
-            dp[0][j] = j
-
-        for i in range(1, m + 1):
-            for j in range(1, n + 1):
-                if a[i - 1] == b[j - 1]:
-                    dp[i][j] = dp[i - 1][j - 1]
-                else:
-                    dp[i][j] = 1 + min(
-                        dp[i - 1][j],  # delete
-                        dp[i][j - 1],  # add
-                        dp[i - 1][j - 1],  # replace
-                    )
-
-        return dp[m][n]
+        if Levenshtein is not None:
+            return Levenshtein.distance(a, b, score_cutoff=score_cutoff)
+
+        return self._levenshtein_bitparallel(a, b, score_cutoff)
+
+    def _levenshtein_bitparallel(
+        self, a: PackedIds, b: PackedIds, score_cutoff: int | None = None
+    ) -> int:
+        """Compute Levenshtein distance with the Myers/Hyyro bit-vector algorithm.
+
+        Each DP column over the shorter sequence is held as bits of a Python int, so
+        every element of the longer sequence costs a few big-int operations instead
+        of a Python-level inner loop.
+
+        Stops early once the distance can no longer come down to score_cutoff, returning
+        a value greater than score_cutoff.
+        """
+        if len(a) > len(b):
+            a, b = b, a
+        m = len(a)
+        if m == 0:
+            return len(b)
+
+        # Bit mask of the positions where each element occurs in a
+        peq: dict = {}
+        bit = 1
+        for x in a:
+            peq[x] = peq.get(x, 0) | bit
+            bit <<= 1
+
+        mask = (1 << m) - 1
+        last = 1 << (m - 1)
+        vp, vn, distance = mask, 0, m
+        # Each remaining element of b lowers the distance by at most one
+        limit = len(b) + (score_cutoff if score_cutoff is not None else len(b))
+        for y in b:
+            eq = peq.get(y, 0)
+            d0 = (((eq & vp) + vp) ^ vp) | eq | vn
+            hp = vn | (~(d0 | vp) & mask)
+            hn = d0 & vp
+            if hp & last:
+                distance += 1
+            elif hn & last:
+                distance -= 1
+            limit -= 1
+            if distance > limit:
+                return distance
+            hp = ((hp << 1) | 1) & mask
+            hn = (hn << 1) & mask
+            vp = hn | (~(d0 | hp) & mask)
+            vn = hp & d0
+
+        return distance
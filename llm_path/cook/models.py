@@ -1,12 +1,12 @@
 """Data models for cooked trace output."""
 
-from dataclasses import asdict, dataclass, field
+from dataclasses import dataclass, field
 from typing import Any, Literal
 
 ApiFormat = Literal["auto", "openai", "claude", "gemini"]
 
 
-@dataclass
+@dataclass(slots=True)
 class CookedMessage:
     """Deduplicated message with stable ID."""
 
@@ -17,8 +17,19 @@ class CookedMessage:
     tool_use_id: str | None = None  # For tool_result: references the tool_use it responds to
     is_error: bool | None = None  # For tool_result: whether the tool execution failed
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, sharing nested values instead of copying them."""
+        return {
+            "id": self.id,
+            "role": self.role,
+            "content": self.content,
+            "tool_calls": self.tool_calls,
+            "tool_use_id": self.tool_use_id,
+            "is_error": self.is_error,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class CookedTool:
     """Deduplicated tool definition with stable ID."""
 
@@ -28,8 +39,18 @@ class CookedTool:
     parameters: dict
     is_server_side: bool = False  # True for server-side tools (e.g., Gemini's googleSearch)
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, sharing nested values instead of copying them."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.parameters,
+            "is_server_side": self.is_server_side,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class CookedRequest:
     """A single request/response pair with references to messages and tools."""
 
@@ -42,6 +63,19 @@ class CookedRequest:
     tools: list[str]  # Tool IDs
     duration_ms: int
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary, sharing nested values instead of copying them."""
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "timestamp": self.timestamp,
+            "request_messages": self.request_messages,
+            "response_messages": self.response_messages,
+            "model": self.model,
+            "tools": self.tools,
+            "duration_ms": self.duration_ms,
+        }
+
 
 @dataclass
 class CookedOutput:
@@ -52,9 +86,12 @@ class CookedOutput:
     requests: list[CookedRequest] = field(default_factory=list)
 
     def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
+        """Convert to dictionary for JSON serialization.
+
+        Built without dataclasses.asdict(), which deep-copies every nested value.
+        """
         return {
-            "messages": [asdict(m) for m in self.messages],
-            "tools": [asdict(t) for t in self.tools],
-            "requests": [asdict(r) for r in self.requests],
+            "messages": [m.to_dict() for m in self.messages],
+            "tools": [t.to_dict() for t in self.tools],
+            "requests": [r.to_dict() for r in self.requests],
         }
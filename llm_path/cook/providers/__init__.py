@@ -25,6 +25,8 @@ def detect_provider(record: dict) -> type[BaseProvider]:
         Provider class that can handle the record
     """
     for provider_cls in PROVIDERS:
+        if provider_cls is OpenAIProvider:
+            break  # The fallback is returned either way, so skip its detection scan
         if provider_cls.detect(record):
             return provider_cls
 
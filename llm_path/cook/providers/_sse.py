@@ -0,0 +1,10 @@
+"""Server-sent events helpers shared by the streaming providers."""
+
+from collections.abc import Iterable, Iterator
+
+
+def iter_data_payloads(sse_lines: Iterable[str]) -> Iterator[str]:
+    """Yield the payload of each "data: " line, with the prefix stripped."""
+    for line in sse_lines:
+        if line[:6] == "data: ":
+            yield line[6:]
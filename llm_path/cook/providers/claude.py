@@ -1,13 +1,35 @@
 """Claude API format provider."""
 
 import json
+from collections.abc import Iterable
 
+from ..._json import JSONDecodeError, loads
 from ..base import BaseProvider, iso_to_unix_ms
 from ..deduplicator import MessageDeduplicator, ToolDeduplicator
 from ..models import CookedRequest
+from ._sse import iter_data_payloads
+
+# Content block types that only appear in Claude messages
+_CLAUDE_BLOCK_TYPES = frozenset({"tool_use", "tool_result", "thinking"})
+
+# SSE event types that only appear in Claude streams
+_CLAUDE_EVENT_TYPES = frozenset(
+    {
+        "message_start",
+        "content_block_start",
+        "content_block_delta",
+        "message_delta",
+        "message_stop",
+    }
+)
+
+# Serialized Claude event types, with and without a space after the colon
+_CLAUDE_EVENT_MARKERS = tuple(
+    f'"type":{sep}"{event_type}"' for event_type in sorted(_CLAUDE_EVENT_TYPES) for sep in ("", " ")
+)
 
 
-def _parse_claude_sse(sse_lines: list[str]) -> dict:
+def _parse_claude_sse(sse_lines: Iterable[str]) -> dict:
     """Parse Claude SSE lines into a response dict.
 
     Claude format:
@@ -22,79 +44,84 @@ def _parse_claude_sse(sse_lines: list[str]) -> dict:
     """
     response_id = None
     model = None
-    content_blocks: dict[int, dict] = {}  # index -> {type, text/name/input}
+    # Blocks by stream index (indexes arrive in order), None until the block starts.
+    # text and input collect delta fragments, joined once when the response is built.
+    content_blocks: list[dict | None] = []  # {type, text/name/input}
     stop_reason = None
 
-    for line in sse_lines:
-        if not line.startswith("data: "):
-            continue
-
-        data = line[6:]
+    for data in iter_data_payloads(sse_lines):
         try:
-            chunk = json.loads(data)
-        except json.JSONDecodeError:
+            chunk = loads(data)
+        except JSONDecodeError:
             continue
 
-        event_type = chunk.get("type", "")
-
-        if event_type == "message_start":
-            message = chunk.get("message", {})
-            response_id = message.get("id")
-            model = message.get("model")
-
-        elif event_type == "content_block_start":
-            index = chunk.get("index", 0)
-            block = chunk.get("content_block", {})
-            block_type = block.get("type", "text")
-            content_blocks[index] = {
-                "type": block_type,
-                "text": block.get("text", ""),
-                "name": block.get("name", ""),
-                "input": "",  # Will be accumulated
-                "id": block.get("id"),  # tool_use ID
-            }
-
-        elif event_type == "content_block_delta":
-            index = chunk.get("index", 0)
-            delta = chunk.get("delta", {})
-            delta_type = delta.get("type", "")
-
-            if index not in content_blocks:
+        # Deltas dominate long streams, so they are matched first
+        match chunk.get("type", ""):
+            case "content_block_delta":
+                index = chunk.get("index", 0)
+                delta = chunk.get("delta", {})
+
+                if index >= len(content_blocks):
+                    content_blocks.extend([None] * (index + 1 - len(content_blocks)))
+                block = content_blocks[index]
+                if block is None:
+                    block = content_blocks[index] = {
+                        "type": "text",
+                        "text": [],
+                        "name": "",
+                        "input": [],
+                    }
+
+                match delta.get("type", ""):
+                    case "text_delta":
+                        block["text"].append(delta.get("text", ""))
+                    case "thinking_delta":
+                        block["text"].append(delta.get("thinking", ""))
+                    case "input_json_delta":
+                        block["input"].append(delta.get("partial_json", ""))
+
+            case "message_start":
+                message = chunk.get("message", {})
+                response_id = message.get("id")
+                model = message.get("model")
+
+            case "content_block_start":
+                index = chunk.get("index", 0)
+                block = chunk.get("content_block", {})
+                block_type = block.get("type", "text")
+                if index >= len(content_blocks):
+                    content_blocks.extend([None] * (index + 1 - len(content_blocks)))
                 content_blocks[index] = {
-                    "type": "text",
-                    "text": "",
-                    "name": "",
-                    "input": "",
+                    "type": block_type,
+                    "text": [block.get("text", "")],
+                    "name": block.get("name", ""),
+                    "input": [],  # Will be accumulated
+                    "id": block.get("id"),  # tool_use ID
                 }
 
-            if delta_type == "text_delta":
-                content_blocks[index]["text"] += delta.get("text", "")
-            elif delta_type == "thinking_delta":
-                content_blocks[index]["text"] += delta.get("thinking", "")
-            elif delta_type == "input_json_delta":
-                content_blocks[index]["input"] += delta.get("partial_json", "")
-
-        elif event_type == "message_delta":
-            delta = chunk.get("delta", {})
-            stop_reason = delta.get("stop_reason")
+            case "message_delta":
+                delta = chunk.get("delta", {})
+                stop_reason = delta.get("stop_reason")
 
     # Build response in Claude format
     content = []
-    for idx in sorted(content_blocks.keys()):
-        block = content_blocks[idx]
+    for block in content_blocks:
+        if block is None:
+            continue
         block_type = block["type"]
 
         if block_type == "text":
-            content.append({"type": "text", "text": block["text"]})
+            content.append({"type": "text", "text": "".join(block["text"])})
         elif block_type == "thinking":
-            content.append({"type": "thinking", "thinking": block["text"]})
+            content.append({"type": "thinking", "thinking": "".join(block["text"])})
         elif block_type == "tool_use":
             input_data = {}
-            if block["input"]:
+            input_json = "".join(block["input"])
+            if input_json:
                 try:
-                    input_data = json.loads(block["input"])
-                except json.JSONDecodeError:
-                    input_data = {"raw": block["input"]}
+                    input_data = loads(input_json)
+                except JSONDecodeError:
+                    input_data = {"raw": input_json}
             tool_use_block = {
                 "type": "tool_use",
                 "name": block["name"],
@@ -112,27 +139,27 @@ def _parse_claude_sse(sse_lines: list[str]) -> dict:
     }
 
 
-def _is_claude_sse(sse_lines: list[str]) -> bool:
-    """Detect if SSE lines are in Claude format."""
-    for line in sse_lines:
-        if line.startswith("data: "):
-            data = line[6:]
-            try:
-                chunk = json.loads(data)
-                # Claude events have a "type" field
-                if "type" in chunk and chunk["type"] in (
-                    "message_start",
-                    "content_block_start",
-                    "content_block_delta",
-                    "message_delta",
-                    "message_stop",
-                ):
-                    return True
-                # OpenAI events have "choices" field
-                if "choices" in chunk:
-                    return False
-            except json.JSONDecodeError:
-                continue
+def _is_claude_sse(sse_lines: Iterable[str]) -> bool:
+    """Detect if SSE lines are in Claude format.
+
+    The first data line is usually decided by a substring scan, only lines without
+    a known marker are parsed as JSON.
+    """
+    for data in iter_data_payloads(sse_lines):
+        if any(marker in data for marker in _CLAUDE_EVENT_MARKERS):
+            return True
+        if '"choices"' in data:
+            return False
+        try:
+            chunk = loads(data)
+            # Claude events have a "type" field
+            if "type" in chunk and chunk["type"] in _CLAUDE_EVENT_TYPES:
+                return True
+            # OpenAI events have "choices" field
+            if "choices" in chunk:
+                return False
+        except JSONDecodeError:
+            continue
     return False
 
 
@@ -145,13 +172,8 @@ class ClaudeProvider(BaseProvider):
         request = record.get("request", {})
         response = record.get("response", {})
 
-        # Check streaming response SSE format
-        if response and response.get("stream") and "sse_lines" in response:
-            if _is_claude_sse(response["sse_lines"]):
-                return True
-
         # Claude indicators: system field is a list of blocks
-        if "system" in request and isinstance(request.get("system"), list):
+        if isinstance(request.get("system"), list):
             return True
 
         # Claude tools have input_schema instead of function.parameters
@@ -159,16 +181,17 @@ class ClaudeProvider(BaseProvider):
         if tools and isinstance(tools[0], dict) and "input_schema" in tools[0]:
             return True
 
+        # Check streaming response SSE format
+        if response and response.get("stream") and "sse_lines" in response:
+            if _is_claude_sse(response["sse_lines"]):
+                return True
+
         # Check for Claude content block types in messages
         for msg in request.get("messages", []):
             content = msg.get("content")
             if isinstance(content, list):
                 for block in content:
-                    if isinstance(block, dict) and block.get("type") in (
-                        "tool_use",
-                        "tool_result",
-                        "thinking",
-                    ):
+                    if isinstance(block, dict) and block.get("type") in _CLAUDE_BLOCK_TYPES:
                         return True
 
         return False
@@ -220,14 +243,15 @@ class ClaudeProvider(BaseProvider):
         if not system:
             return []
 
+        get_or_create = message_dedup.get_or_create
         msg_ids = []
         for block in system:
             if isinstance(block, dict) and block.get("type") == "text":
                 content = block.get("text", "")
-                msg_id = message_dedup.get_or_create("system", content)
+                msg_id = get_or_create("system", content)
                 msg_ids.append(msg_id)
             elif isinstance(block, str):
-                msg_id = message_dedup.get_or_create("system", block)
+                msg_id = get_or_create("system", block)
                 msg_ids.append(msg_id)
         return msg_ids
 
@@ -238,6 +262,7 @@ class ClaudeProvider(BaseProvider):
         message_dedup: MessageDeduplicator,
     ) -> list[str]:
         """Process Claude request messages and return list of message IDs."""
+        get_or_create = message_dedup.get_or_create
         msg_ids = []
 
         # First add system messages
@@ -249,35 +274,39 @@ class ClaudeProvider(BaseProvider):
 
             # Handle content as string (simple case)
             if isinstance(content, str):
-                msg_id = message_dedup.get_or_create(role, content)
+                msg_id = get_or_create(role, content)
                 msg_ids.append(msg_id)
                 continue
 
             # Handle content as array of blocks
             if isinstance(content, list):
-                msg_ids.extend(self._process_content_blocks(role, content, message_dedup))
+                self._process_content_blocks(role, content, message_dedup, msg_ids)
 
         return msg_ids
 
     def _process_content_blocks(
-        self, role: str, blocks: list[dict], message_dedup: MessageDeduplicator
-    ) -> list[str]:
-        """Process Claude content blocks and return message IDs.
+        self,
+        role: str,
+        blocks: list[dict],
+        message_dedup: MessageDeduplicator,
+        out: list[str],
+    ) -> None:
+        """Process Claude content blocks, appending their message IDs to out.
 
         Each text block becomes a separate message (consistent with OpenAI handling).
         Thinking blocks become separate messages with role "thinking".
         Tool use blocks are collected into a single tool_use message.
         Tool result blocks become separate tool_result messages.
         """
-        msg_ids = []
+        get_or_create = message_dedup.get_or_create
         tool_calls = []
 
         for block in blocks:
             if not isinstance(block, dict):
                 # Plain string - create message
                 content = str(block)
-                msg_id = message_dedup.get_or_create(role, content)
-                msg_ids.append(msg_id)
+                msg_id = get_or_create(role, content)
+                out.append(msg_id)
                 continue
 
             block_type = block.get("type", "")
@@ -285,15 +314,15 @@ class ClaudeProvider(BaseProvider):
             if block_type == "text":
                 # Each text block becomes a separate message
                 content = block.get("text", "")
-                msg_id = message_dedup.get_or_create(role, content)
-                msg_ids.append(msg_id)
+                msg_id = get_or_create(role, content)
+                out.append(msg_id)
 
             elif block_type == "thinking":
                 # Create separate thinking message
                 thinking_text = block.get("thinking", "")
                 if thinking_text:
-                    msg_id = message_dedup.get_or_create("thinking", thinking_text)
-                    msg_ids.append(msg_id)
+                    msg_id = get_or_create("thinking", thinking_text)
+                    out.append(msg_id)
 
             elif block_type == "tool_use":
                 # Collect tool calls with their IDs
@@ -317,30 +346,28 @@ class ClaudeProvider(BaseProvider):
                 # Extract tool_use_id reference and error status
                 tool_use_id = block.get("tool_use_id")
                 is_error = block.get("is_error")
-                msg_id = message_dedup.get_or_create(
+                msg_id = get_or_create(
                     "tool_result",
                     str(result_content),
                     tool_use_id=tool_use_id,
                     is_error=is_error,
                 )
-                msg_ids.append(msg_id)
+                out.append(msg_id)
 
             elif block_type == "image":
-                msg_id = message_dedup.get_or_create(role, "[image]")
-                msg_ids.append(msg_id)
+                msg_id = get_or_create(role, "[image]")
+                out.append(msg_id)
 
             else:
                 # Unknown block type - serialize as JSON
                 content = json.dumps(block, ensure_ascii=False)
-                msg_id = message_dedup.get_or_create(role, content)
-                msg_ids.append(msg_id)
+                msg_id = get_or_create(role, content)
+                out.append(msg_id)
 
         # Create tool_use message if there are tool calls
         if tool_calls:
-            msg_id = message_dedup.get_or_create("tool_use", "", tool_calls)
-            msg_ids.append(msg_id)
-
-        return msg_ids
+            msg_id = get_or_create("tool_use", "", tool_calls)
+            out.append(msg_id)
 
     def _process_response(
         self,
@@ -349,11 +376,12 @@ class ClaudeProvider(BaseProvider):
         message_dedup: MessageDeduplicator,
     ) -> list[str]:
         """Process Claude response and return list of message IDs."""
+        get_or_create = message_dedup.get_or_create
         if error:
-            return [message_dedup.get_or_create("assistant", f"Error: {error}")]
+            return [get_or_create("assistant", f"Error: {error}")]
 
         if not response:
-            return [message_dedup.get_or_create("assistant", "")]
+            return [get_or_create("assistant", "")]
 
         # Handle streaming response - parse SSE lines first
         if response.get("stream") and "sse_lines" in response:
@@ -362,7 +390,7 @@ class ClaudeProvider(BaseProvider):
 
         content = response.get("content", [])
         if not content:
-            return [message_dedup.get_or_create("assistant", "")]
+            return [get_or_create("assistant", "")]
 
         msg_ids = []
         text_parts = []
@@ -382,7 +410,7 @@ class ClaudeProvider(BaseProvider):
                 # Create separate thinking message
                 thinking_text = block.get("thinking", "")
                 if thinking_text:
-                    msg_id = message_dedup.get_or_create("thinking", thinking_text)
+                    msg_id = get_or_create("thinking", thinking_text)
                     msg_ids.append(msg_id)
 
             elif block_type == "tool_use":
@@ -397,14 +425,14 @@ class ClaudeProvider(BaseProvider):
         # Split text and tool_calls into separate messages (consistent with request handling)
         combined_text = "".join(text_parts)
         if combined_text:
-            msg_id = message_dedup.get_or_create("assistant", combined_text)
+            msg_id = get_or_create("assistant", combined_text)
             msg_ids.append(msg_id)
         if tool_calls:
-            msg_id = message_dedup.get_or_create("tool_use", "", tool_calls)
+            msg_id = get_or_create("tool_use", "", tool_calls)
             msg_ids.append(msg_id)
         # If no content at all (no text, tool_calls, or thinking), create empty assistant message
         if not msg_ids:
-            msg_ids.append(message_dedup.get_or_create("assistant", ""))
+            msg_ids.append(get_or_create("assistant", ""))
 
         return msg_ids
 
@@ -413,6 +441,7 @@ class ClaudeProvider(BaseProvider):
         if not tools:
             return []
 
+        get_or_create = tool_dedup.get_or_create
         tool_ids = []
         for tool in tools:
             name = tool.get("name", "")
@@ -420,6 +449,6 @@ class ClaudeProvider(BaseProvider):
             # Claude uses input_schema instead of parameters
             parameters = tool.get("input_schema", {})
 
-            tool_id = tool_dedup.get_or_create(name, description, parameters)
+            tool_id = get_or_create(name, description, parameters)
             tool_ids.append(tool_id)
         return tool_ids
@@ -6,6 +6,9 @@ from ..base import BaseProvider, iso_to_unix_ms
 from ..deduplicator import MessageDeduplicator, ToolDeduplicator
 from ..models import CookedRequest
 
+# Tool keys holding custom function declarations (snake_case and camelCase)
+_FUNCTION_DECLARATION_KEYS = frozenset({"function_declarations", "functionDeclarations"})
+
 
 class GeminiProvider(BaseProvider):
     """Provider for Gemini API format.
@@ -74,14 +77,11 @@ class GeminiProvider(BaseProvider):
 
         # Process system instruction (support both snake_case and camelCase)
         system_instruction = request.get("system_instruction") or request.get("systemInstruction")
-        system_msg_ids = self._process_system_instruction(system_instruction, message_dedup)
+        request_msg_ids = self._process_system_instruction(system_instruction, message_dedup)
 
-        # Process request messages (contents)
+        # Process request messages (contents), appended after the system messages
         contents = request.get("contents", [])
-        request_msg_ids = self._process_contents(contents, message_dedup)
-
-        # Prepend system messages
-        request_msg_ids = system_msg_ids + request_msg_ids
+        self._process_contents(contents, message_dedup, request_msg_ids)
 
         # Process response messages
         response_msg_ids = self._process_response(response, error, message_dedup)
@@ -115,25 +115,24 @@ class GeminiProvider(BaseProvider):
         if not system_instruction:
             return []
 
+        get_or_create = message_dedup.get_or_create
         msg_ids = []
         parts = system_instruction.get("parts", [])
         for part in parts:
             if isinstance(part, dict) and "text" in part:
                 content = part.get("text", "")
                 if content:
-                    msg_id = message_dedup.get_or_create("system", content)
+                    msg_id = get_or_create("system", content)
                     msg_ids.append(msg_id)
             elif isinstance(part, str):
-                msg_id = message_dedup.get_or_create("system", part)
+                msg_id = get_or_create("system", part)
                 msg_ids.append(msg_id)
         return msg_ids
 
     def _process_contents(
-        self, contents: list[dict], message_dedup: MessageDeduplicator
-    ) -> list[str]:
-        """Process Gemini contents array into message IDs."""
-        msg_ids = []
-
+        self, contents: list[dict], message_dedup: MessageDeduplicator, out: list[str]
+    ) -> None:
+        """Process Gemini contents array, appending their message IDs to out."""
         for content in contents:
             role = content.get("role", "")
             parts = content.get("parts", [])
@@ -142,9 +141,7 @@ class GeminiProvider(BaseProvider):
             # model -> assistant, user -> user, None -> depends on content
             mapped_role = self._map_role(role)
 
-            msg_ids.extend(self._process_parts(parts, mapped_role, message_dedup))
-
-        return msg_ids
+            self._process_parts(parts, mapped_role, message_dedup, out)
 
     def _map_role(self, role: str | None) -> str:
         """Map Gemini role to standard role."""
@@ -156,9 +153,13 @@ class GeminiProvider(BaseProvider):
         return "user"
 
     def _process_parts(
-        self, parts: list[dict], base_role: str, message_dedup: MessageDeduplicator
-    ) -> list[str]:
-        """Process Gemini parts array into message IDs.
+        self,
+        parts: list[dict],
+        base_role: str,
+        message_dedup: MessageDeduplicator,
+        out: list[str],
+    ) -> None:
+        """Process Gemini parts array, appending their message IDs to out.
 
         Parts can contain:
         - text: regular text content
@@ -166,7 +167,7 @@ class GeminiProvider(BaseProvider):
         - function_response/functionResponse: tool result
         - thoughtSignature: indicates thinking (no content)
         """
-        msg_ids = []
+        get_or_create = message_dedup.get_or_create
         text_content = []
         tool_calls = []
 
@@ -202,12 +203,12 @@ class GeminiProvider(BaseProvider):
                 else:
                     result_content = str(response_data)
 
-                msg_id = message_dedup.get_or_create(
+                msg_id = get_or_create(
                     "tool_result",
                     result_content,
                     tool_use_id=name,  # Use function name as reference
                 )
-                msg_ids.append(msg_id)
+                out.append(msg_id)
 
             # thoughtSignature indicates thinking but doesn't contain actual content
             # We skip it as there's no text to display
@@ -215,15 +216,13 @@ class GeminiProvider(BaseProvider):
         # Create message for text content
         if text_content:
             combined_text = "".join(text_content)
-            msg_id = message_dedup.get_or_create(base_role, combined_text)
-            msg_ids.append(msg_id)
+            msg_id = get_or_create(base_role, combined_text)
+            out.append(msg_id)
 
         # Create message for tool calls
         if tool_calls:
-            msg_id = message_dedup.get_or_create("tool_use", "", tool_calls)
-            msg_ids.append(msg_id)
-
-        return msg_ids
+            msg_id = get_or_create("tool_use", "", tool_calls)
+            out.append(msg_id)
 
     def _process_response(
         self,
@@ -232,15 +231,16 @@ class GeminiProvider(BaseProvider):
         message_dedup: MessageDeduplicator,
     ) -> list[str]:
         """Process Gemini response and return list of message IDs."""
+        get_or_create = message_dedup.get_or_create
         if error:
-            return [message_dedup.get_or_create("assistant", f"Error: {error}")]
+            return [get_or_create("assistant", f"Error: {error}")]
 
         if not response:
-            return [message_dedup.get_or_create("assistant", "")]
+            return [get_or_create("assistant", "")]
 
         candidates = response.get("candidates", [])
         if not candidates:
-            return [message_dedup.get_or_create("assistant", "")]
+            return [get_or_create("assistant", "")]
 
         # Get the first candidate's content
         first_candidate = candidates[0]
@@ -248,10 +248,12 @@ class GeminiProvider(BaseProvider):
         parts = content.get("parts", [])
 
         if not parts:
-            return [message_dedup.get_or_create("assistant", "")]
+            return [get_or_create("assistant", "")]
 
         # Process parts as response
-        return self._process_parts(parts, "assistant", message_dedup)
+        msg_ids: list[str] = []
+        self._process_parts(parts, "assistant", message_dedup, msg_ids)
+        return msg_ids
 
     def _process_tools(self, tools: list[dict], tool_dedup: ToolDeduplicator) -> list[str]:
         """Process Gemini tool definitions and return list of tool IDs.
@@ -266,6 +268,7 @@ class GeminiProvider(BaseProvider):
         if not tools:
             return []
 
+        get_or_create = tool_dedup.get_or_create
         # Known Gemini server-side tool names
         server_side_tools = {
             "googleSearch": "Google Search - enables web search capabilities",
@@ -282,12 +285,12 @@ class GeminiProvider(BaseProvider):
                 description = decl.get("description", "")
                 parameters = decl.get("parameters", {})
 
-                tool_id = tool_dedup.get_or_create(name, description, parameters)
+                tool_id = get_or_create(name, description, parameters)
                 tool_ids.append(tool_id)
 
             # Check for server-side tools (keys other than function_declarations)
             for key, value in tool.items():
-                if key in ("function_declarations", "functionDeclarations"):
+                if key in _FUNCTION_DECLARATION_KEYS:
                     continue
 
                 # This is a server-side tool
@@ -295,9 +298,7 @@ class GeminiProvider(BaseProvider):
                 # Use the tool config as parameters if it's not empty
                 parameters = value if isinstance(value, dict) and value else {}
 
-                tool_id = tool_dedup.get_or_create(
-                    key, description, parameters, is_server_side=True
-                )
+                tool_id = get_or_create(key, description, parameters, is_server_side=True)
                 tool_ids.append(tool_id)
 
         return tool_ids
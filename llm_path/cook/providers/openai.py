@@ -1,10 +1,13 @@
 """OpenAI API format provider."""
 
 import json
+from typing import Any
 
+from ..._json import JSONDecodeError, loads
 from ..base import BaseProvider, iso_to_unix_ms
 from ..deduplicator import MessageDeduplicator, ToolDeduplicator
 from ..models import CookedRequest
+from ._sse import iter_data_payloads
 
 
 def _map_role(role: str, tool_calls: list[dict] | None) -> str:
@@ -16,7 +19,25 @@ def _map_role(role: str, tool_calls: list[dict] | None) -> str:
     return role
 
 
-def _parse_tool_calls(tool_calls: list[dict] | None) -> list[dict] | None:
+def _decode_arguments(arguments: str, cache: dict[str, Any]) -> Any:
+    """Decode a tool call's JSON arguments string, memoized in cache.
+
+    Every request resends the earlier tool calls of its conversation, so the same
+    string is decoded many times in one cook.
+    """
+    decoded = cache.get(arguments)
+    if decoded is None:
+        try:
+            decoded = loads(arguments)
+        except JSONDecodeError:
+            decoded = {"raw": arguments}  # Keep as raw if not valid JSON
+        cache[arguments] = decoded
+    return decoded
+
+
+def _parse_tool_calls(
+    tool_calls: list[dict] | None, arguments_cache: dict[str, Any]
+) -> list[dict] | None:
     """Parse tool_calls, flattening to {name, arguments, id} format for frontend."""
     if not tool_calls:
         return None
@@ -31,10 +52,7 @@ def _parse_tool_calls(tool_calls: list[dict] | None) -> list[dict] | None:
 
             # Decode JSON arguments string to dict
             if isinstance(arguments, str):
-                try:
-                    arguments = json.loads(arguments)
-                except json.JSONDecodeError:
-                    arguments = {"raw": arguments}  # Keep as raw if not valid JSON
+                arguments = _decode_arguments(arguments, arguments_cache)
 
             call = {"name": name, "arguments": arguments}
             # Preserve tool call ID from OpenAI format
@@ -57,19 +75,16 @@ def _parse_openai_sse(sse_lines: list[str]) -> dict:
     response_id = None
     model = None
     content_parts = []
-    tool_calls: dict[int, dict] = {}  # index -> {name, arguments}
+    # index -> {id, name, arguments}, arguments collects fragments joined once at the end
+    tool_calls: dict[int, dict] = {}
 
-    for line in sse_lines:
-        if not line.startswith("data: "):
-            continue
-
-        data = line[6:]
+    for data in iter_data_payloads(sse_lines):
         if data == "[DONE]":
             continue
 
         try:
-            chunk = json.loads(data)
-        except json.JSONDecodeError:
+            chunk = loads(data)
+        except JSONDecodeError:
             continue
 
         # Extract metadata
@@ -94,17 +109,18 @@ def _parse_openai_sse(sse_lines: list[str]) -> dict:
         delta_tool_calls = delta.get("tool_calls", [])
         for tc in delta_tool_calls:
             idx = tc.get("index", 0)
-            if idx not in tool_calls:
-                tool_calls[idx] = {"id": "", "name": "", "arguments": ""}
+            call = tool_calls.get(idx)
+            if call is None:
+                call = tool_calls[idx] = {"id": "", "name": "", "arguments": []}
 
             if "id" in tc:
-                tool_calls[idx]["id"] = tc["id"]
+                call["id"] = tc["id"]
             if "function" in tc:
                 func = tc["function"]
                 if "name" in func:
-                    tool_calls[idx]["name"] = func["name"]
+                    call["name"] = func["name"]
                 if "arguments" in func:
-                    tool_calls[idx]["arguments"] += func["arguments"]
+                    call["arguments"].append(func["arguments"])
 
     # Build response in OpenAI format
     message: dict = {
@@ -117,9 +133,9 @@ def _parse_openai_sse(sse_lines: list[str]) -> dict:
             {
                 "id": tc["id"],
                 "type": "function",
-                "function": {"name": tc["name"], "arguments": tc["arguments"]},
+                "function": {"name": tc["name"], "arguments": "".join(tc["arguments"])},
             }
-            for tc in sorted(tool_calls.values(), key=lambda x: x.get("id", ""))
+            for _, tc in sorted(tool_calls.items())
         ]
 
     return {
@@ -132,6 +148,10 @@ def _parse_openai_sse(sse_lines: list[str]) -> dict:
 class OpenAIProvider(BaseProvider):
     """Provider for OpenAI API format."""
 
+    def __init__(self) -> None:
+        # Decoded tool call arguments by their JSON string, for the lifetime of one cook
+        self._arguments_cache: dict[str, Any] = {}
+
     @staticmethod
     def detect(record: dict) -> bool:
         """Detect if record is in OpenAI format.
@@ -252,12 +272,12 @@ class OpenAIProvider(BaseProvider):
                 # If there are tool_calls, add a separate message for them
                 if tool_calls:
                     mapped_role = _map_role(role, tool_calls)
-                    parsed_tool_calls = _parse_tool_calls(tool_calls)
+                    parsed_tool_calls = _parse_tool_calls(tool_calls, self._arguments_cache)
                     msg_id = message_dedup.get_or_create(mapped_role, "", parsed_tool_calls)
                     msg_ids.append(msg_id)
             else:
                 mapped_role = _map_role(role, tool_calls)
-                parsed_tool_calls = _parse_tool_calls(tool_calls)
+                parsed_tool_calls = _parse_tool_calls(tool_calls, self._arguments_cache)
                 msg_id = message_dedup.get_or_create(
                     mapped_role, content, parsed_tool_calls, tool_use_id=tool_call_id
                 )
@@ -274,11 +294,12 @@ class OpenAIProvider(BaseProvider):
         if isinstance(item, str):
             return item
         if isinstance(item, dict):
+            item_type = item.get("type")
             # Text content block
-            if item.get("type") == "text":
+            if item_type == "text":
                 return item.get("text", "")
             # Image URL content block
-            if item.get("type") == "image_url":
+            if item_type == "image_url":
                 image_url = item.get("image_url", {})
                 url = image_url.get("url", "") if isinstance(image_url, dict) else str(image_url)
                 # Truncate base64 data URLs for display
@@ -318,7 +339,7 @@ class OpenAIProvider(BaseProvider):
 
         # Create a single message with both content and tool_calls
         mapped_role = _map_role(role, tool_calls)
-        parsed_tool_calls = _parse_tool_calls(tool_calls)
+        parsed_tool_calls = _parse_tool_calls(tool_calls, self._arguments_cache)
         msg_id = message_dedup.get_or_create(mapped_role, content or "", parsed_tool_calls)
         return [msg_id]
 
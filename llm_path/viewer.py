@@ -1,21 +1,23 @@
 """Viewer server for trace visualization."""
 
-import json
+import http.client
 import socket
 import subprocess
 import sys
 import webbrowser
+from functools import lru_cache
 from pathlib import Path
 
-import httpx
 import uvicorn
 from starlette.applications import Starlette
-from starlette.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, JSONResponse, Response
 from starlette.routing import Mount, Route
 from starlette.staticfiles import StaticFiles
 
+from ._json import JSONDecodeError, dumps, loads
 from ._version import __version__
-from .cook import TraceCooker
+from .cook import TraceCooker, read_records
 
 APP_NAME = "llm-path"
 DEFAULT_PORT = 8765
@@ -41,22 +43,14 @@ def load_and_cook_file(file_path: str) -> dict:
     if not input_file.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    content = input_file.read_text(encoding="utf-8")
+    # JSONL is parsed line by line, a JSON file as a whole
+    records = read_records(input_file)
 
-    # Try to parse as JSON first
-    try:
-        data = json.loads(content)
-        # Check if already cooked
+    # Check if already cooked (a single object with the cooked output keys)
+    if len(records) == 1:
+        data = records[0]
         if isinstance(data, dict) and all(k in data for k in ("messages", "tools", "requests")):
             return data
-        # Single record or array of records - need to cook
-        records = data if isinstance(data, list) else [data]
-    except json.JSONDecodeError:
-        # Parse as JSONL
-        records = []
-        for line in content.strip().split("\n"):
-            if line.strip():
-                records.append(json.loads(line))
 
     # Cook the records
     cooker = TraceCooker()
@@ -64,6 +58,33 @@ def load_and_cook_file(file_path: str) -> dict:
     return output.to_dict()
 
 
+def load_cooked_json(file_path: str) -> bytes:
+    """Load a trace file and return its cooked data serialized as JSON.
+
+    Results are cached until the file's modification time or size changes, so
+    reloading the viewer neither re-cooks nor re-serializes an unchanged file.
+
+    Args:
+        file_path: Path to the trace file (JSONL or cooked JSON)
+
+    Returns:
+        Cooked trace data as UTF-8 JSON bytes
+    """
+    input_file = Path(file_path)
+
+    if not input_file.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    stat = input_file.stat()
+    return _cooked_json(str(input_file.resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _cooked_json(file_path: str, mtime_ns: int, size: int) -> bytes:
+    """Cook and serialize a trace file, cached by path, modification time and size."""
+    return dumps(load_and_cook_file(file_path))
+
+
 def create_viewer_app() -> Starlette:
     """Create the viewer Starlette app."""
     viewer_dist = get_viewer_dist_path()
@@ -84,11 +105,12 @@ def create_viewer_app() -> Starlette:
             return JSONResponse({"error": "Missing 'path' parameter"}, status_code=400)
 
         try:
-            data = load_and_cook_file(file_path)
-            return JSONResponse(data)
+            # Cooking is blocking file IO and CPU work, keep it off the event loop
+            content = await run_in_threadpool(load_cooked_json, file_path)
+            return Response(content, media_type="application/json")
         except FileNotFoundError as e:
             return JSONResponse({"error": str(e)}, status_code=404)
-        except json.JSONDecodeError as e:
+        except JSONDecodeError as e:
             return JSONResponse({"error": f"Invalid JSON: {e}"}, status_code=400)
 
     async def index_endpoint(request):
@@ -109,6 +131,10 @@ def create_viewer_app() -> Starlette:
 def is_port_in_use(port: int, host: str = "127.0.0.1") -> bool:
     """Check if a port is in use."""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        # Match uvicorn's bind, so a port left in TIME_WAIT by a previous run counts as free.
+        # Not on Windows, where SO_REUSEADDR would also allow binding a port that is listening.
+        if sys.platform != "win32":
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         try:
             s.bind((host, port))
             return False
@@ -122,12 +148,17 @@ def check_existing_server(port: int, host: str = "127.0.0.1") -> dict | None:
     Returns:
         Server info dict if it's our server, None otherwise
     """
+    # A plain HTTP request, so the probe doesn't build an httpx client and its SSL context
+    conn = http.client.HTTPConnection(host, port, timeout=2.0)
     try:
-        response = httpx.get(f"http://{host}:{port}/_info", timeout=2.0)
-        if response.status_code == 200:
-            return response.json()
-    except (httpx.RequestError, json.JSONDecodeError):
+        conn.request("GET", "/_info")
+        response = conn.getresponse()
+        if response.status == 200:
+            return loads(response.read())
+    except (OSError, http.client.HTTPException, JSONDecodeError):
         pass
+    finally:
+        conn.close()
     return None
 
 